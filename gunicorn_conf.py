@@ -0,0 +1,16 @@
+"""
+Gunicorn settings for the web player
+- gunicorn -c gunicorn_conf.py web_player:app
+- `python web_player.py` uses these settings too when gunicorn is installed
+"""
+
+bind = '0.0.0.0:8080'
+
+# One worker with many threads: the playlist cache and the sync start time
+# live in process memory, so every TV has to be served by the same process.
+workers = 1
+worker_class = 'gthread'
+# Each open /api/playlist/stream holds a thread, so web_player.STREAM_MAX_CLIENTS
+# caps them well below this; the rest serve media, /api/playlist and /api/command.
+threads = 32
+keepalive = 30
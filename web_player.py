@@ -4,15 +4,46 @@ Digital Signage Web Player
 - Serves content as web app for network TVs
 - Multiple TVs can connect simultaneously
 - Auto-refresh when content changes
+- Playlist helpers are annotated so the module can be compiled with mypyc
+  (`mypyc web_player.py`); the built extension is imported in place of this file
 """
 
-from flask import Flask, render_template, send_from_directory, jsonify
+from flask import Flask, Response, render_template, request, send_from_directory, abort
+from werkzeug.security import safe_join
+from urllib.parse import quote
 from pathlib import Path
+from typing import Optional, Sequence, Union
 import logging
 import json
 import hashlib
 import time
 import os
+import sys
+import threading
+import functools
+import pickle
+import sqlite3
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from bisect import bisect_right
+from itertools import accumulate
+from queue import Queue, Empty
+
+# Optional: orjson for faster JSON parsing/serialization (falls back to stdlib json)
+try:
+    import orjson  # type: ignore[import-not-found, unused-ignore]
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+    orjson = None  # type: ignore[assignment]
+
+# Optional: inotify_simple for event-driven cache invalidation (falls back to stat polling)
+try:
+    from inotify_simple import INotify, flags as inotify_flags  # type: ignore[import-untyped, import-not-found, unused-ignore]
+    HAS_INOTIFY = True
+except ImportError:
+    HAS_INOTIFY = False
+    INotify = inotify_flags = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -26,43 +57,318 @@ PLAYLIST_JSON = Path.home() / 'signage' / 'playlist.json'
 VIDEOS_DIR = Path.home() / 'signage' / 'content' / 'videos'
 PRESENTATIONS_DIR = Path.home() / 'signage' / 'content' / 'presentations'
 SLIDES_CACHE_DIR = Path.home() / 'signage' / 'cache' / 'slides'
+SLIDES_MANIFEST = Path.home() / 'signage' / 'cache' / 'slides.manifest'
+DURATIONS_DB = Path.home() / 'signage' / 'cache' / 'durations.sqlite'
 VIDEO_FORMATS = ['.mp4', '.avi', '.mov', '.mkv', '.webm']
+_VIDEO_EXTS = frozenset(VIDEO_FORMATS)
 SLIDE_DURATION = 10
 
+# When running behind nginx, set SIGNAGE_ACCEL_REDIRECT to the internal location
+# prefix (e.g. /_signage) so media is sent by nginx instead of through Python:
+#   location /_signage/videos/ { internal; alias /home/pi/signage/content/videos/; }
+#   location /_signage/slides/ { internal; alias /home/pi/signage/cache/slides/; }
+ACCEL_REDIRECT_PREFIX = os.environ.get('SIGNAGE_ACCEL_REDIRECT', '').rstrip('/')
+
+def _loads(data):
+    """Parse JSON from bytes (or str)."""
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _dumps(obj):
+    """Serialize to JSON bytes."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+def _dumps_sorted(obj):
+    """Serialize to JSON bytes with sorted keys (stable input for hashing)."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, sort_keys=True).encode()
+
+def _json_response(obj):
+    """Like jsonify(), but serialized with _dumps()."""
+    return app.response_class(_dumps(obj), mimetype='application/json')
+
+# --- Playlist cache ---
+# Building the playlist reads config/playlist JSON and enumerates the content
+# directories, which is slow on an SD card. Results are cached and only rebuilt
+# when the mtime signature of the inputs changes, so a poll costs a few stat() calls.
+# 'entry' is (playlist, hash, item offsets), replaced as one tuple so readers
+# never pair a playlist with another playlist's hash or offsets. 'retry_at' forces
+# a rebuild at that time even if inputs are unchanged (see _build_sync_playlist).
+# Each cache has its own lock, held only to swap in a finished build; 'building'
+# marks a rebuild in progress so other requests keep serving the previous entry.
+def _new_cache():
+    return {'lock': threading.Lock(), 'building': False,
+            'sig': None, 'gen': None, 'entry': None, 'retry_at': None}
+
+_cache: dict = _new_cache()
+_sync_cache: dict = _new_cache()
+_playlist_body: tuple = (None, b'')  # (hash, serialized /api/playlist response)
+_config_cache: tuple = (None, None)
+
+def _mtime_ns(path):
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def _slides_signature():
+    """mtime of the slides cache dir plus each presentation subdirectory.
+    Slides are written into an existing subdirectory, which does not touch
+    the mtime of SLIDES_CACHE_DIR itself.
+    """
+    try:
+        with os.scandir(SLIDES_CACHE_DIR) as it:
+            subdirs = sorted((e.name, e.stat().st_mtime_ns) for e in it if e.is_dir())
+    except FileNotFoundError:
+        return None
+    return (_mtime_ns(SLIDES_CACHE_DIR), tuple(subdirs))
+
+def _playlist_signature():
+    return (
+        _mtime_ns(CONFIG_FILE),
+        _mtime_ns(PLAYLIST_JSON),
+        _mtime_ns(VIDEOS_DIR),
+        _slides_signature(),
+    )
+
+def _sync_signature():
+    """Playlist signature plus (name, mtime, size) of every video.
+    Sync durations depend on file contents, and rewriting a video in place
+    does not change the mtime of VIDEOS_DIR.
+    """
+    videos = []
+    try:
+        with os.scandir(VIDEOS_DIR) as it:
+            for e in it:
+                if os.path.splitext(e.name)[1].lower() in _VIDEO_EXTS and e.is_file():
+                    st = e.stat()
+                    videos.append((e.name, st.st_mtime_ns, st.st_size))
+    except FileNotFoundError:
+        pass
+    return (_playlist_signature(), tuple(sorted(videos)))
+
+# With inotify available, a background thread bumps _watch_generation on every
+# change to the inputs; while it is unchanged a cached playlist is served without
+# even computing the mtime signature. Without inotify every request stats the inputs.
+_watcher_lock = threading.Lock()
+_watcher_thread: Optional[threading.Thread] = None
+_watcher_active = False
+_watch_generation = 0
+
+# Queues of connected /api/playlist/stream clients, woken by the watcher
+_subscribers: list[Queue] = []
+_subscribers_lock = threading.Lock()
+STREAM_KEEPALIVE = 15  # seconds between keepalive comments / hash re-checks
+# Each open stream holds a server thread for as long as the TV stays connected,
+# so only a few are allowed; keep this well below `threads` in gunicorn_conf.py.
+# Clients turned away fall back to polling /api/playlist (cheap thanks to ETag/304).
+STREAM_MAX_CLIENTS = 8
+
+def _watch_content():
+    """Background thread: bump _watch_generation whenever a playlist input changes."""
+    global _watcher_active, _watch_generation
+    mask = (inotify_flags.CREATE | inotify_flags.DELETE | inotify_flags.CLOSE_WRITE
+            | inotify_flags.MOVED_TO | inotify_flags.MOVED_FROM)
+    inotify = None
+    try:
+        inotify = INotify()
+        # config.json and playlist.json are watched via their directory, since
+        # they may be replaced rather than modified in place
+        base_dirs = {CONFIG_FILE.parent, PLAYLIST_JSON.parent, VIDEOS_DIR}
+        base_wds = {inotify.add_watch(str(d), mask) for d in base_dirs}
+        slides_wd = inotify.add_watch(str(SLIDES_CACHE_DIR), mask)
+        base_wds.add(slides_wd)
+        with os.scandir(SLIDES_CACHE_DIR) as it:
+            for e in it:
+                if e.is_dir():
+                    inotify.add_watch(e.path, mask)
+    except OSError as e:
+        logger.info(f"inotify unavailable, falling back to polling: {e}")
+        if inotify is not None:
+            inotify.close()
+        return
+
+    _watcher_active = True
+    # anything that changed before the watches were in place is picked up by
+    # the signature check this forces
+    _watch_generation += 1
+    logger.info("Watching content directories for changes")
+
+    try:
+        while True:
+            for event in inotify.read():
+                if event.mask & inotify_flags.IGNORED and event.wd in base_wds:
+                    raise OSError(f"watched directory removed (wd={event.wd})")
+                if (event.wd == slides_wd and event.mask & inotify_flags.ISDIR
+                        and event.mask & (inotify_flags.CREATE | inotify_flags.MOVED_TO)):
+                    try:
+                        inotify.add_watch(str(SLIDES_CACHE_DIR / event.name), mask)
+                    except OSError:
+                        pass
+            _watch_generation += 1
+            _notify_subscribers()
+    except Exception:
+        logger.exception('Content watcher stopped, falling back to polling')
+    finally:
+        _watcher_active = False
+        inotify.close()
+
+def _notify_subscribers():
+    with _subscribers_lock:
+        for q in _subscribers:
+            q.put_nowait('changed')
+
+def _start_watcher():
+    global _watcher_thread
+    if not HAS_INOTIFY or _watcher_thread is not None:
+        return
+    with _watcher_lock:
+        if _watcher_thread is None:
+            _watcher_thread = threading.Thread(target=_watch_content, name='content-watcher', daemon=True)
+            _watcher_thread.start()
+
+def _retry_due(cache):
+    retry_at = cache['retry_at']
+    return retry_at is not None and time.time() >= retry_at
+
+def _get_cached(cache, build, signature=_playlist_signature):
+    """Return (playlist, hash, offsets) from `cache`, rebuilding it if inputs changed.
+    `build` returns (playlist, retry_at); `signature` identifies the inputs.
+    """
+    _start_watcher()
+    gen = _watch_generation
+    if _watcher_active and cache['gen'] == gen and not _retry_due(cache):
+        return cache['entry']
+    sig = signature()
+    with cache['lock']:
+        if cache['sig'] == sig and not _retry_due(cache):
+            cache['gen'] = gen
+            return cache['entry']
+        if cache['building'] and cache['entry'] is not None:
+            # another request is rebuilding (possibly running ffprobe); don't wait for it
+            return cache['entry']
+        cache['building'] = True
+
+    # build without holding the lock
+    try:
+        playlist, retry_at = build()
+        entry = (playlist, get_playlist_hash_from(playlist), calculate_item_offsets(playlist))
+    except Exception:
+        with cache['lock']:
+            cache['building'] = False
+        raise
+    with cache['lock']:
+        cache.update(entry=entry, sig=sig, gen=gen, retry_at=retry_at, building=False)
+    return entry
+
+def read_config():
+    """Parsed config.json, re-read only when its mtime changes."""
+    global _config_cache
+    mtime = _mtime_ns(CONFIG_FILE)
+    if mtime is None:
+        return {'mode': 'both'}
+    if _config_cache[0] == mtime:
+        return _config_cache[1]
+    try:
+        cfg = _loads(CONFIG_FILE.read_bytes())
+        if not isinstance(cfg, dict):
+            cfg = {'mode': 'both'}
+    except Exception:
+        cfg = {'mode': 'both'}
+    _config_cache = (mtime, cfg)
+    return cfg
+
+def _list_slides(pres_dir: Path) -> list[str]:
+    """Sorted slide_*.png file names in one presentation cache dir."""
+    try:
+        with os.scandir(pres_dir) as it:
+            names = [e.name for e in it
+                     if e.name.startswith('slide_') and e.name.endswith('.png') and e.is_file()]
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+    names.sort()  # zero-padded slide_NNN names sort in slide order
+    return names
+
+# The slide index is also persisted to SLIDES_MANIFEST so a restarted (or
+# second) web player process does not have to walk the whole slides cache again.
+def _load_slide_manifest(sig):
+    """Return [(presentation, slide_name), ...] from the manifest if it matches `sig`."""
+    try:
+        with open(SLIDES_MANIFEST, 'rb') as f:
+            data = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        logger.warning('Ignoring unreadable slides manifest')
+        return None
+    if isinstance(data, dict) and data.get('sig') == sig:
+        return data.get('slides')
+    return None
+
+def _rebuild_slide_manifest(sig):
+    """Scan the slides cache and write a fresh manifest for `sig`."""
+    entries = []
+    # the signature already lists the presentation subdirectories, sorted by name
+    for pres, _ in sig[1]:
+        entries.extend((pres, name) for name in _list_slides(SLIDES_CACHE_DIR / pres))
+    try:
+        # unique temp name: both playlist caches may rebuild at the same time
+        tmp = SLIDES_MANIFEST.with_name(f'{SLIDES_MANIFEST.name}.{threading.get_ident()}.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump({'sig': sig, 'slides': entries}, f, protocol=5)
+        os.replace(tmp, SLIDES_MANIFEST)
+    except OSError as e:
+        logger.warning(f"Failed to write slides manifest: {e}")
+    return entries
+
+@functools.lru_cache(maxsize=4)
+def _scan_video_files(mtime_ns):
+    """Sorted video paths; `mtime_ns` of VIDEOS_DIR is only the cache key."""
+    # single scandir pass instead of one glob per extension/case
+    try:
+        with os.scandir(VIDEOS_DIR) as it:
+            names = [e.name for e in it
+                     if e.is_file() and os.path.splitext(e.name)[1].lower() in _VIDEO_EXTS]
+    except FileNotFoundError:
+        return ()
+    return tuple(VIDEOS_DIR / name for name in sorted(names))
+
+@functools.lru_cache(maxsize=4)
+def _scan_slide_files(sig):
+    """Sorted slide paths; `sig` (see _slides_signature) is the cache key."""
+    entries = _load_slide_manifest(sig)
+    if entries is None:
+        entries = _rebuild_slide_manifest(sig)
+    return tuple(SLIDES_CACHE_DIR / pres / name for pres, name in entries)
+
 def get_video_files():
-    files = []
-    if VIDEOS_DIR.exists():
-        for ext in VIDEO_FORMATS:
-            files.extend(VIDEOS_DIR.glob(f"*{ext}"))
-            files.extend(VIDEOS_DIR.glob(f"*{ext.upper()}"))
-    return sorted(files)
+    mtime = _mtime_ns(VIDEOS_DIR)
+    if mtime is None:
+        return ()
+    return _scan_video_files(mtime)
 
 def get_slide_files():
-    slides = []
-    if SLIDES_CACHE_DIR.exists():
-        for presentation_dir in sorted(SLIDES_CACHE_DIR.iterdir()):
-            if presentation_dir.is_dir():
-                slides.extend(sorted(presentation_dir.glob("slide_*.png")))
-    return slides
-
-def get_playlist():
+    sig = _slides_signature()
+    if sig is None:
+        return ()
+    return _scan_slide_files(sig)
+
+def get_playlist() -> list[dict]:
     playlist = []
     
     # read mode config (both|video|presentation)
-    try:
-        mode = 'both'
-        if CONFIG_FILE.exists():
-            cfg = json.loads(CONFIG_FILE.read_text())
-            mode = cfg.get('mode', 'both')
-    except Exception:
-        mode = 'both'
+    mode = read_config().get('mode', 'both')
 
     # If a JSON playlist exists, honor it (selected filenames). It should be a list of filenames
     # (videos or presentation filenames). Presentations are expanded to their cached slides.
-    selected = []
+    selected: list[dict] = []
     try:
         if PLAYLIST_JSON.exists():
-            data = json.loads(PLAYLIST_JSON.read_text())
+            data = _loads(PLAYLIST_JSON.read_bytes())
             if isinstance(data, list):
                 # normalize to list of objects with repeats
                 for entry in data:
@@ -90,26 +396,26 @@ def get_playlist():
             if not name:
                 continue
             if name in video_files and mode in ('both', 'video'):
-                for _ in range(repeats):
-                    playlist.append({
-                        'type': 'video',
-                        'url': f'/content/videos/{video_files[name].name}',
-                        'name': video_files[name].name
-                    })
+                # items are never mutated, so repeats can share one dict
+                item = {
+                    'type': 'video',
+                    'url': f'/content/videos/{video_files[name].name}',
+                    'name': video_files[name].name
+                }
+                playlist.extend([item] * repeats)
             else:
                 # treat as presentation filename; expand to slides by stem
                 stem = Path(name).stem
                 pres_dir = SLIDES_CACHE_DIR / stem
-                if pres_dir.exists() and pres_dir.is_dir() and mode in ('both', 'presentation'):
-                    for _ in range(repeats):
-                        for slide in sorted(pres_dir.glob('slide_*.png')):
-                            rel = slide.relative_to(SLIDES_CACHE_DIR)
-                            playlist.append({
-                                'type': 'image',
-                                'url': f'/content/slides/{rel.as_posix()}',
-                                'name': slide.name,
-                                'duration': SLIDE_DURATION
-                            })
+                if mode in ('both', 'presentation'):
+                    # enumerate the deck once; each repeat plays it through in order
+                    items = [{
+                        'type': 'image',
+                        'url': f'/content/slides/{stem}/{slide_name}',
+                        'name': slide_name,
+                        'duration': SLIDE_DURATION
+                    } for slide_name in _list_slides(pres_dir)]
+                    playlist.extend(items * repeats)
     else:
         for video in get_video_files():
             if mode in ('both', 'video'):
@@ -132,48 +438,175 @@ def get_playlist():
     return playlist
 
 def get_playlist_hash():
-    playlist = get_playlist()
-    playlist_str = json.dumps(playlist, sort_keys=True)
-    return hashlib.md5(playlist_str.encode()).hexdigest()
+    """Hash of the current /api/playlist playlist (served from the playlist cache)."""
+    return _get_cached(_cache, _build_playlist)[1]
+
+def _build_playlist():
+    return get_playlist(), None
 
 # --- Synchronization helpers (non-breaking additions) ---
 # These are used by the optional `/api/playlist-sync` endpoint.
 # They are added in a way that does not change the existing `/api/playlist` behavior.
 
 # Global playlist sync state (kept separate so original API is unchanged)
-_playlist_cache = None
-_playlist_hash_cache = None
-_playlist_start_time = None
+_playlist_cache: Optional[list] = None
+_playlist_hash_cache: Optional[str] = None
+_playlist_start_time: Optional[float] = None
+_playlist_sync_lock = threading.Lock()
+
+DEFAULT_VIDEO_DURATION = 30  # used when ffprobe is unavailable or fails
+PROBE_RETRY_INTERVAL = 60  # first retry delay for a video ffprobe could not read
+PROBE_RETRY_MAX = 3600  # retry delay doubles per failure up to this
+
+# ffprobe results are kept in DURATIONS_DB keyed by path and checked against
+# mtime/size, so each video is probed once rather than on every rebuild.
+_durations_db: Optional[sqlite3.Connection] = None
+_durations_lock = threading.Lock()
+# Failed probes by path: (mtime_ns, size, retry_at, delay). A file is not probed
+# again before retry_at unless it changes. If the ffprobe binary itself is
+# missing, probing stops altogether until restart.
+_probe_failures: dict = {}
+_ffprobe_missing = False
+
+def _get_durations_db():
+    global _durations_db
+    if _durations_db is None:
+        DURATIONS_DB.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(str(DURATIONS_DB), check_same_thread=False)
+        db.execute('CREATE TABLE IF NOT EXISTS durations '
+                   '(path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, duration REAL)')
+        _durations_db = db
+    return _durations_db
+
+def _probe_duration(video_path):
+    """Return the duration of `video_path` in seconds via ffprobe, or None."""
+    global _ffprobe_missing
+    cmd = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+           '-of', 'default=noprint_wrappers=1:nokey=1', str(video_path)]
+    try:
+        out = subprocess.run(cmd, capture_output=True, text=True, check=True, timeout=30).stdout
+        return float(out.strip())
+    except FileNotFoundError:
+        with _durations_lock:
+            if not _ffprobe_missing:
+                logger.warning(f"ffprobe not found, using {DEFAULT_VIDEO_DURATION}s for video durations")
+            _ffprobe_missing = True
+        return None
+    except (OSError, subprocess.SubprocessError, ValueError) as e:
+        logger.warning(f"ffprobe failed for {video_path.name}: {e}")
+        return None
+
+def _cached_duration(key, st):
+    try:
+        with _durations_lock:
+            row = _get_durations_db().execute(
+                'SELECT mtime_ns, size, duration FROM durations WHERE path = ?', (key,)).fetchone()
+    except sqlite3.Error:
+        logger.exception('Failed to read video duration cache')
+        return None
+    if row and row[0] == st.st_mtime_ns and row[1] == st.st_size:
+        return row[2]
+    return None
+
+def _store_duration(key, st, duration):
+    try:
+        with _durations_lock:
+            db = _get_durations_db()
+            db.execute('REPLACE INTO durations VALUES (?, ?, ?, ?)',
+                       (key, st.st_mtime_ns, st.st_size, duration))
+            db.commit()
+    except sqlite3.Error:
+        logger.exception('Failed to store video duration')
+
+def _probe_backed_off(key, st):
+    """True if this version of `key` failed to probe and is not due for a retry yet."""
+    with _durations_lock:
+        failure = _probe_failures.get(key)
+    return (failure is not None and failure[:2] == (st.st_mtime_ns, st.st_size)
+            and time.time() < failure[2])
+
+def _record_probe_failure(key, st):
+    with _durations_lock:
+        failure = _probe_failures.get(key)
+        delay = PROBE_RETRY_INTERVAL
+        if failure is not None and failure[:2] == (st.st_mtime_ns, st.st_size):
+            delay = min(failure[3] * 2, PROBE_RETRY_MAX)
+        _probe_failures[key] = (st.st_mtime_ns, st.st_size, time.time() + delay, delay)
+
+def _probe_retry_at(video_paths):
+    """Earliest time a failed probe of one of `video_paths` is due again, or None."""
+    if _ffprobe_missing:
+        return None
+    with _durations_lock:
+        due = [_probe_failures[str(p)][2] for p in video_paths if str(p) in _probe_failures]
+    return min(due) if due else None
+
+def get_video_durations(video_paths: Sequence[Path]) -> list[Optional[float]]:
+    """Get durations in seconds for `video_paths`, in order.
+    Probed with ffprobe once per file version and cached in DURATIONS_DB;
+    uncached videos are probed concurrently. None where probing failed.
+    """
+    durations: list[Optional[float]] = [None] * len(video_paths)
+    missing = []  # (index, path, stat)
+    for i, video_path in enumerate(video_paths):
+        try:
+            st = video_path.stat()
+        except OSError:
+            continue
+        duration = _cached_duration(str(video_path), st)
+        if duration is not None:
+            durations[i] = duration
+        elif not _ffprobe_missing and not _probe_backed_off(str(video_path), st):
+            missing.append((i, video_path, st))
+
+    if missing:
+        workers = min(len(missing), (os.cpu_count() or 1) * 2)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            probed = pool.map(_probe_duration, [path for _, path, _ in missing])
+            for (i, video_path, st), duration in zip(missing, probed):
+                if duration is not None:
+                    _store_duration(str(video_path), st, duration)
+                    durations[i] = duration
+                    with _durations_lock:
+                        _probe_failures.pop(str(video_path), None)
+                elif not _ffprobe_missing:
+                    _record_probe_failure(str(video_path), st)
+    return durations
 
 def get_video_duration(video_path):
-    """Get video duration in seconds (placeholder).
-    For a production system integrate ffprobe or mediainfo. Using
-    a sensible default prevents the sync endpoint from breaking.
+    """Get video duration in seconds (see get_video_durations).
+    Falls back to DEFAULT_VIDEO_DURATION so the sync endpoint keeps working.
     """
-    return 30  # default estimate in seconds
+    duration = get_video_durations([video_path])[0]
+    return DEFAULT_VIDEO_DURATION if duration is None else duration
 
-def build_playlist_with_durations():
+def build_playlist_with_durations() -> list[dict]:
     """Build playlist including per-item durations for sync playback."""
+    return _build_sync_playlist()[0]
+
+def _build_sync_playlist():
+    """Return (playlist, retry_at) for the sync endpoint.
+    Videos that could not be probed get DEFAULT_VIDEO_DURATION; retry_at is
+    then set to when the earliest of them may be probed again, so the estimate
+    is not kept until some other input changes.
+    """
     playlist = []
+    unprobed = []
 
     # Respect configured mode
-    try:
-        mode = 'both'
-        if CONFIG_FILE.exists():
-            cfg = json.loads(CONFIG_FILE.read_text())
-            mode = cfg.get('mode', 'both')
-    except Exception:
-        mode = 'both'
-
-    for video in get_video_files():
-        if mode in ('both', 'video'):
-            duration = get_video_duration(video)
-            playlist.append({
-                'type': 'video',
-                'url': f'/content/videos/{video.name}',
-                'name': video.name,
-                'duration': duration
-            })
+    mode = read_config().get('mode', 'both')
+
+    videos = get_video_files() if mode in ('both', 'video') else []
+    for video, duration in zip(videos, get_video_durations(videos)):
+        if duration is None:
+            duration = DEFAULT_VIDEO_DURATION
+            unprobed.append(video)
+        playlist.append({
+            'type': 'video',
+            'url': f'/content/videos/{video.name}',
+            'name': video.name,
+            'duration': duration
+        })
 
     for slide in get_slide_files():
         if mode in ('both', 'presentation'):
@@ -185,29 +618,37 @@ def build_playlist_with_durations():
                 'duration': SLIDE_DURATION
             })
 
-    return playlist
+    return playlist, _probe_retry_at(unprobed)
 
-def get_playlist_hash_from(playlist):
-    playlist_str = json.dumps(playlist, sort_keys=True)
-    return hashlib.md5(playlist_str.encode()).hexdigest()
+def get_playlist_hash_from(playlist: list[dict]) -> str:
+    return hashlib.blake2b(_dumps_sorted(playlist), digest_size=16).hexdigest()
 
-def calculate_total_duration(playlist):
+def calculate_total_duration(playlist: list[dict]) -> Union[int, float]:
     return sum(item.get('duration', 0) for item in playlist)
 
-def get_current_item_index(playlist, elapsed_time):
-    total_duration = calculate_total_duration(playlist)
+def calculate_item_offsets(playlist: list[dict]) -> list[Union[int, float]]:
+    """Running total of durations, i.e. the end time of each item within one loop."""
+    return list(accumulate(item.get('duration', 0) for item in playlist))
+
+def get_current_item_index(playlist: list[dict], elapsed_time: Union[int, float],
+                           offsets: Optional[list[Union[int, float]]] = None
+                           ) -> tuple[int, Union[int, float]]:
+    """Return (index, seconds into that item) for `elapsed_time` since the loop started.
+    Pass precomputed `offsets` (see calculate_item_offsets) to skip the O(n) pass.
+    """
+    if offsets is None:
+        offsets = calculate_item_offsets(playlist)
+    total_duration = offsets[-1] if offsets else 0
     if total_duration == 0:
         return 0, 0
 
     position_in_loop = elapsed_time % total_duration
-    cumulative = 0
-    for idx, item in enumerate(playlist):
-        if cumulative + item.get('duration', 0) > position_in_loop:
-            item_elapsed = position_in_loop - cumulative
-            return idx, item_elapsed
-        cumulative += item.get('duration', 0)
-
-    return 0, 0
+    # first item whose end time is past the current position
+    idx = bisect_right(offsets, position_in_loop)
+    if idx >= len(offsets):
+        return 0, 0
+    item_start = offsets[idx - 1] if idx else 0
+    return idx, position_in_loop - item_start
 
 @app.route('/')
 def player():
@@ -215,10 +656,73 @@ def player():
 
 @app.route('/api/playlist')
 def api_playlist():
-    return jsonify({
-        'playlist': get_playlist(),
-        'hash': get_playlist_hash()
-    })
+    global _playlist_body
+    playlist, playlist_hash, _ = _get_cached(_cache, _build_playlist)
+    # The hash doubles as ETag: browsers revalidate with If-None-Match and
+    # get an empty 304 while the playlist is unchanged.
+    if request.if_none_match.contains(playlist_hash):
+        resp = app.response_class(status=304)
+        resp.set_etag(playlist_hash)
+        resp.headers['Cache-Control'] = 'no-cache'
+        return resp
+    # the cached playlist is never mutated, so its serialized form can be reused
+    body = _playlist_body
+    if body[0] != playlist_hash:
+        body = (playlist_hash, _dumps({
+            'playlist': playlist,
+            'hash': playlist_hash
+        }))
+        _playlist_body = body
+    resp = app.response_class(body[1], mimetype='application/json')
+    resp.set_etag(playlist_hash)
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+
+@app.route('/api/playlist/stream')
+def api_playlist_stream():
+    """Server-Sent Events stream of the playlist hash.
+    Sends the current hash on connect and again whenever it changes, so
+    clients only need to fetch `/api/playlist` when told to. Without
+    inotify the hash is re-checked every STREAM_KEEPALIVE seconds instead.
+    At most STREAM_MAX_CLIENTS streams are served; further clients get 503.
+    """
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    if request.method == 'HEAD':
+        # no body is sent, so don't take a stream slot
+        return Response(mimetype='text/event-stream', headers=headers)
+
+    q = Queue()
+    with _subscribers_lock:
+        if len(_subscribers) >= STREAM_MAX_CLIENTS:
+            return Response('Too many playlist streams, poll /api/playlist instead\n',
+                            status=503, mimetype='text/plain', headers={'Retry-After': '60'})
+        _subscribers.append(q)
+
+    def unsubscribe():
+        with _subscribers_lock:
+            if q in _subscribers:
+                _subscribers.remove(q)
+
+    def events():
+        last_hash = None
+        while True:
+            playlist_hash = get_playlist_hash()
+            if playlist_hash != last_hash:
+                last_hash = playlist_hash
+                yield f'data: {playlist_hash}\n\n'
+            else:
+                # also lets us notice clients that went away
+                yield ': keepalive\n\n'
+            try:
+                q.get(timeout=STREAM_KEEPALIVE)
+            except Empty:
+                pass
+
+    response = Response(events(), mimetype='text/event-stream', headers=headers)
+    # runs when the server closes the response, even if events() never started
+    response.call_on_close(unsubscribe)
+    return response
 
 
 @app.route('/api/playlist-sync')
@@ -229,57 +733,92 @@ def api_playlist_sync():
     """
     global _playlist_cache, _playlist_hash_cache, _playlist_start_time
 
-    playlist = build_playlist_with_durations()
-    playlist_hash = get_playlist_hash_from(playlist)
+    playlist, playlist_hash, offsets = _get_cached(_sync_cache, _build_sync_playlist, _sync_signature)
 
-    # If playlist changed, reset start time
-    if playlist_hash != _playlist_hash_cache:
-        _playlist_cache = playlist
-        _playlist_hash_cache = playlist_hash
-        _playlist_start_time = time.time()
-        logger.info(f"Playlist updated (sync): {len(playlist)} items")
+    # If playlist changed, reset start time (hash and start time change together)
+    with _playlist_sync_lock:
+        if playlist_hash != _playlist_hash_cache:
+            _playlist_cache = playlist
+            _playlist_hash_cache = playlist_hash
+            _playlist_start_time = time.time()
+            logger.info(f"Playlist updated (sync): {len(playlist)} items")
+        start_time = _playlist_start_time
 
-    if _playlist_start_time and playlist:
-        elapsed = time.time() - _playlist_start_time
-        current_index, item_elapsed = get_current_item_index(playlist, elapsed)
+    if start_time and playlist:
+        elapsed = time.time() - start_time
+        current_index, item_elapsed = get_current_item_index(playlist, elapsed, offsets)
     else:
         current_index = 0
         item_elapsed = 0
 
-    return jsonify({
+    return _json_response({
         'playlist': playlist,
         'hash': playlist_hash,
         'serverTime': time.time(),
-        'playlistStartTime': _playlist_start_time or time.time(),
+        'playlistStartTime': start_time or time.time(),
         'currentIndex': current_index,
         'itemElapsed': item_elapsed
     })
 
 
+_command_cache: tuple = (None, None)  # (mtime_ns, parsed commands/web.json)
+
 @app.route('/api/command')
 def api_command():
     """Return any pending command intended for web players and clear it."""
+    global _command_cache
     try:
         cmdfile = CONFIG_FILE.parent.joinpath('commands', 'web.json')
-        if cmdfile.exists():
-            try:
-                data = json.loads(cmdfile.read_text())
-            except Exception:
-                data = {}
+        mtime = _mtime_ns(cmdfile)
+        if mtime is not None:
+            # commands are rare: only re-read the file when its mtime changes
+            if _command_cache[0] != mtime:
+                try:
+                    data = _loads(cmdfile.read_bytes())
+                except FileNotFoundError:
+                    return _json_response({'ok': True, 'command': None})
+                except Exception:
+                    data = {}
+                _command_cache = (mtime, data)
             # Do NOT delete the command file here — keep it for other connected clients.
             # Clients will deduplicate using the timestamp (ts) value.
-            return jsonify({'ok': True, 'command': data})
+            return _json_response({'ok': True, 'command': _command_cache[1]})
     except Exception:
         logger.exception('Failed reading command file')
-    return jsonify({'ok': True, 'command': None})
+    return _json_response({'ok': True, 'command': None})
+
+def _send_media(directory, location, filename):
+    """Send a media file, delegating the transfer to nginx when configured."""
+    if ACCEL_REDIRECT_PREFIX:
+        path = safe_join(str(directory), filename)
+        if path is None or not os.path.isfile(path):
+            abort(404)
+        resp = app.response_class()
+        resp.headers['X-Accel-Redirect'] = f'{ACCEL_REDIRECT_PREFIX}/{location}/{quote(filename)}'
+        # let nginx pick the Content-Type from the file extension
+        del resp.headers['Content-Type']
+        return resp
+    return send_from_directory(directory, filename, conditional=True)
 
 @app.route('/content/videos/<path:filename>')
 def serve_video(filename):
-    return send_from_directory(VIDEOS_DIR, filename)
+    return _send_media(VIDEOS_DIR, 'videos', filename)
 
 @app.route('/content/slides/<path:filename>')
 def serve_slide(filename):
-    return send_from_directory(SLIDES_CACHE_DIR, filename)
+    return _send_media(SLIDES_CACHE_DIR, 'slides', filename)
+
+def run_gunicorn():
+    """Serve `web_player:app` with gunicorn using gunicorn_conf.py, in this process.
+    Keeps `web_player.py` in the command line, which the dashboard uses to
+    track the running web player. The app is imported by module name, so a
+    mypyc build of this file is used when present.
+    """
+    from gunicorn.app.wsgiapp import WSGIApplication  # type: ignore[import-untyped, import-not-found, unused-ignore]
+
+    here = Path(__file__).resolve().parent
+    sys.argv = [sys.argv[0], '--chdir', str(here), '-c', str(here / 'gunicorn_conf.py'), 'web_player:app']
+    WSGIApplication('%(prog)s [OPTIONS] [APP_MODULE]').run()
 
 if __name__ == '__main__':
     logger.info("=" * 60)
@@ -287,4 +826,9 @@ if __name__ == '__main__':
     logger.info("TVs should open: http://<pi-ip>:8080")
     logger.info("=" * 60)
     
-    app.run(host='0.0.0.0', port=8080, debug=False)
+    try:
+        run_gunicorn()
+    except ImportError:
+        # development fallback: werkzeug server, one thread per request
+        logger.info("gunicorn not installed, using the development server")
+        app.run(host='0.0.0.0', port=8080, debug=False, threaded=True)